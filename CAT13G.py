@@ -1,140 +1,526 @@
+import math
+from array import array
 import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from queue import Queue, Empty
 from tkinter import Tk, Label, Button, Entry, StringVar, IntVar, messagebox, Listbox, Scrollbar, SINGLE, END
 from tkinter import Frame
 from tabulate import tabulate
-from itertools import combinations
+from itertools import product, repeat
+from operator import add, ge
+from bisect import bisect_left
+
+class ConnectionManager:
+    """
+    Manage the SQLite connections used by the auction engine.
+
+    The database runs in WAL journal mode, so readers see the last committed
+    state and never wait on a settlement in progress. All writes go through a
+    single dedicated connection serialised by a lock, while views and reporting
+    borrow read-only connections from a pool and may run from any thread.
+    """
+
+    def __init__(self, path, pool_size=4):
+        """
+        :param path: Path of the SQLite database file.
+        :param pool_size: Maximum number of pooled read-only connections.
+        """
+        self.path = path
+        self.pool_size = pool_size
+        self._write_lock = threading.Lock()
+        self._pool_lock = threading.Lock()
+        self._readers = Queue()
+        self._reader_count = 0
+
+        self._writer = self._connect()
+        self._writer.execute("PRAGMA journal_mode=WAL")
+        self._writer.execute("PRAGMA wal_autocheckpoint=1000")
+
+    def _connect(self, read_only=False):
+        if read_only:
+            uri = Path(self.path).resolve().as_uri() + "?mode=ro"
+            connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            connection.execute("PRAGMA query_only=ON")
+        else:
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            # NORMAL is durable across application crashes in WAL mode
+            connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA busy_timeout=5000")
+        connection.execute("PRAGMA temp_store=MEMORY")
+        connection.execute("PRAGMA cache_size=-8000")
+        return connection
+
+    def _acquire_reader(self):
+        try:
+            return self._readers.get_nowait()
+        except Empty:
+            pass
+        with self._pool_lock:
+            if self._reader_count < self.pool_size:
+                self._reader_count += 1
+                return self._connect(read_only=True)
+        # Pool exhausted: wait for another thread to hand a connection back
+        return self._readers.get()
+
+    @contextmanager
+    def reader(self):
+        """Borrow a read-only cursor from the pool."""
+        connection = self._acquire_reader()
+        cursor = connection.cursor()
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+            self._readers.put(connection)
+
+    @contextmanager
+    def writer(self):
+        """Yield a cursor on the writer connection; commit on success, roll back on error."""
+        with self._write_lock:
+            cursor = self._writer.cursor()
+            try:
+                yield cursor
+                self._writer.commit()
+            except BaseException:
+                self._writer.rollback()
+                raise
+            finally:
+                cursor.close()
+
+    def close(self):
+        with self._pool_lock:
+            while not self._readers.empty():
+                self._readers.get_nowait().close()
+            self._reader_count = 0
+        with self._write_lock:
+            self._writer.close()
 
 # Connect to SQLite database (or create it if it doesn't exist)
-conn = sqlite3.connect('auction_engine2.db')
-cursor = conn.cursor()
-
-# Create tables if not already created
-cursor.execute('''CREATE TABLE IF NOT EXISTS service_providers (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL
-                )''')
-
-cursor.execute('''CREATE TABLE IF NOT EXISTS services (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    provider_id INTEGER NOT NULL,
-                    name TEXT NOT NULL,
-                    quantity INTEGER NOT NULL,
-                    initial_price REAL DEFAULT 10.0,
-                    FOREIGN KEY (provider_id) REFERENCES service_providers(id)
-                )''')
-
-cursor.execute('''CREATE TABLE IF NOT EXISTS bids (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    customer TEXT NOT NULL,
-                    bid_price REAL NOT NULL,
-                    bundle TEXT NOT NULL
-                )''')
-
-cursor.execute('''CREATE TABLE IF NOT EXISTS customers (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL
-                )''')
-
-conn.commit()
+db = ConnectionManager('auction_engine2.db')
+
+with db.writer() as cursor:
+    # Create tables if not already created
+    cursor.execute('''CREATE TABLE IF NOT EXISTS service_providers (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        name TEXT NOT NULL
+                    )''')
+
+    cursor.execute('''CREATE TABLE IF NOT EXISTS services (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        provider_id INTEGER NOT NULL,
+                        name TEXT NOT NULL,
+                        quantity INTEGER NOT NULL,
+                        initial_price REAL DEFAULT 10.0,
+                        FOREIGN KEY (provider_id) REFERENCES service_providers(id)
+                    )''')
+
+    cursor.execute('''CREATE TABLE IF NOT EXISTS bids (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        customer TEXT NOT NULL,
+                        bid_price REAL NOT NULL,
+                        bundle TEXT NOT NULL,
+                        xor_group TEXT
+                    )''')
+
+    cursor.execute('''CREATE TABLE IF NOT EXISTS customers (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        name TEXT NOT NULL
+                    )''')
+
+    # Databases created before XOR bid groups existed lack the column
+    cursor.execute("PRAGMA table_info(bids)")
+    if "xor_group" not in [column[1] for column in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE bids ADD COLUMN xor_group TEXT")
+
+    # Partial covering index of available services in ID order: the listbox and view_services
+    # queries (WHERE quantity > 0 ORDER BY id) read it alone, never touching sold-out rows
+    cursor.execute("DROP INDEX IF EXISTS idx_services_quantity")
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_services_available
+                      ON services(id, name, initial_price, quantity, provider_id) WHERE quantity > 0""")
 
 def fetch_services():
-    cursor.execute("SELECT * FROM services")
-    rows = cursor.fetchall()
+    with db.reader() as cursor:
+        cursor.execute("SELECT * FROM services")
+        rows = cursor.fetchall()
     return {row[0]: {"provider_id": row[1], "name": row[2], "quantity": row[3], "initial_price": row[4], "updated_price": row[4]} for row in rows}
 
 def fetch_service_providers():
-    cursor.execute("SELECT * FROM service_providers")
-    return {row[0]: row[1] for row in cursor.fetchall()}
+    with db.reader() as cursor:
+        cursor.execute("SELECT * FROM service_providers")
+        rows = cursor.fetchall()
+    return {row[0]: row[1] for row in rows}
+
+def parse_bundle(bundle):
+    """
+    Parse a compact bundle string into a mapping of service ID to units.
+
+    Entries are comma-separated and are either a bare service ID ("3") or a
+    service ID with a unit count ("3:2"). Repeated IDs are summed.
+
+    :param bundle: Bundle string as stored in the bids table.
+    :return: Dictionary mapping each service ID to the number of units requested.
+    """
+    units = {}
+    for entry in bundle.split(','):
+        service_id, _, count = entry.partition(':')
+        count = int(count) if count else 1
+        if count < 1:
+            raise ValueError(f"Invalid unit count in bundle entry '{entry}'")
+        service_id = int(service_id)
+        units[service_id] = units.get(service_id, 0) + count
+    return units
+
+def encode_bundle(units):
+    """Encode a mapping of service ID to units back into its compact bundle string."""
+    return ",".join(str(service_id) if count == 1 else f"{service_id}:{count}"
+                    for service_id, count in units.items())
+
+def bundle_price(bid, services):
+    """Return the price of a bid's bundle at the services' updated prices, counting every unit."""
+    return sum(services[service_id]["updated_price"] * units for service_id, units in bid["units"].items())
+
+def bundle_names(bid, services):
+    """Return the human-readable contents of a bid's bundle, e.g. ["Hotel A x2", "Taxi"]."""
+    return [services[service_id]['name'] if units == 1 else f"{services[service_id]['name']} x{units}"
+            for service_id, units in bid["units"].items()]
 
 def fetch_bids():
-    cursor.execute("SELECT * FROM bids")
-    rows = cursor.fetchall()
-    return [{"id": row[0], "customer": row[1], "bid_price": row[2], "bundle": list(map(int, row[3].split(',')))} for row in rows]
+    with db.reader() as cursor:
+        cursor.execute("SELECT id, customer, bid_price, bundle, xor_group FROM bids")
+        rows = cursor.fetchall()
+    bids = []
+    for row in rows:
+        units = parse_bundle(row[3])
+        bids.append({"id": row[0], "customer": row[1], "bid_price": row[2],
+                     "bundle": list(units), "units": units, "xor_group": row[4]})
+    return bids
+
+def fetch_available_services(service_ids=None):
+    """
+    Fetch the listbox rows of services that still have units available.
+
+    :param service_ids: Optional IDs to restrict the query to; services among them
+                        that are sold out or deleted are simply absent from the result.
+    :return: List of (id, name, initial_price, quantity) tuples ordered by ID.
+    """
+    query = "SELECT id, name, initial_price, quantity FROM services WHERE quantity > 0"
+    with db.reader() as cursor:
+        if service_ids is None:
+            cursor.execute(query + " ORDER BY id")
+            return cursor.fetchall()
+
+        # Chunk the IN list to stay under SQLite's bound-parameter limit
+        service_ids = list(service_ids)
+        rows = []
+        for start in range(0, len(service_ids), 500):
+            chunk = service_ids[start:start + 500]
+            cursor.execute(query + f" AND id IN ({','.join('?' * len(chunk))})", chunk)
+            rows.extend(cursor.fetchall())
+    return sorted(rows)
 
 def view_services():
-    services = fetch_services()
-    service_providers = fetch_service_providers()
-    
-    table = []
-    for service_id, details in services.items():
-        if details["quantity"] > 0:
-            provider_name = service_providers.get(details['provider_id'], 'Unknown')
-            table.append([service_id, details['name'], provider_name, details['quantity'], details['initial_price']])
+    with db.reader() as cursor:
+        cursor.execute("""SELECT s.id, s.name, COALESCE(p.name, 'Unknown'), s.quantity, s.initial_price
+                          FROM services s LEFT JOIN service_providers p ON p.id = s.provider_id
+                          WHERE s.quantity > 0
+                          ORDER BY s.id""")
+        table = [list(row) for row in cursor.fetchall()]
     
     headers = ["ID", "Name", "Provider", "Quantity", "Initial Price"]
     return table, headers
 
 def add_service_provider(provider_name):
-    cursor.execute("INSERT INTO service_providers (name) VALUES (?)", (provider_name,))
-    conn.commit()
-    
-    cursor.execute("SELECT id FROM service_providers WHERE name = ?", (provider_name,))
-    provider_id = cursor.fetchone()[0]
+    with db.writer() as cursor:
+        cursor.execute("INSERT INTO service_providers (name) VALUES (?)", (provider_name,))
+        provider_id = cursor.lastrowid
     
     return provider_id
 
 def add_service(provider_id, service_name, quantity, initial_price):
-    cursor.execute("INSERT INTO services (provider_id, name, quantity, initial_price) VALUES (?, ?, ?, ?)",
-                   (provider_id, service_name, quantity, initial_price))
-    conn.commit()
+    with db.writer() as cursor:
+        cursor.execute("INSERT INTO services (provider_id, name, quantity, initial_price) VALUES (?, ?, ?, ?)",
+                       (provider_id, service_name, quantity, initial_price))
+        service_id = cursor.lastrowid
+    return service_id
 
 def update_service(service_id, new_quantity, new_price):
-    cursor.execute("UPDATE services SET quantity = ?, initial_price = ? WHERE id = ?", 
-                   (new_quantity, new_price, service_id))
-    conn.commit()
+    with db.writer() as cursor:
+        cursor.execute("UPDATE services SET quantity = ?, initial_price = ? WHERE id = ?", 
+                       (new_quantity, new_price, service_id))
 
 def add_customer(customer_name):
-    cursor.execute("INSERT INTO customers (name) VALUES (?)", (customer_name,))
-    conn.commit()
+    with db.writer() as cursor:
+        cursor.execute("INSERT INTO customers (name) VALUES (?)", (customer_name,))
+
+def add_bid(customer_name, bid_price, selected_services, xor_group=None):
+    """
+    Store a bid for a bundle of services.
 
-def add_bid(customer_name, bid_price, selected_services):
-    bundle = ",".join(map(str, selected_services))
-    cursor.execute("INSERT INTO bids (customer, bid_price, bundle) VALUES (?, ?, ?)",
-                   (customer_name, bid_price, bundle))
-    conn.commit()
+    :param customer_name: Name of the bidding customer.
+    :param bid_price: Price offered for the whole bundle.
+    :param selected_services: Dictionary mapping service ID to units requested.
+    :param xor_group: Optional group label; at most one bid per customer and group can win.
+    """
+    bundle = encode_bundle(selected_services)
+    with db.writer() as cursor:
+        cursor.execute("INSERT INTO bids (customer, bid_price, bundle, xor_group) VALUES (?, ?, ?, ?)",
+                       (customer_name, bid_price, bundle, xor_group or None))
 
 def clear_all_bids():
-    cursor.execute("DELETE FROM bids")
-    conn.commit()
+    with db.writer() as cursor:
+        cursor.execute("DELETE FROM bids")
 
 def clear_all_data():
-    cursor.execute("DELETE FROM bids")
-    cursor.execute("DELETE FROM services")
-    cursor.execute("DELETE FROM service_providers")
-    cursor.execute("DELETE FROM customers")
-    conn.commit()
+    with db.writer() as cursor:
+        cursor.execute("DELETE FROM bids")
+        cursor.execute("DELETE FROM services")
+        cursor.execute("DELETE FROM service_providers")
+        cursor.execute("DELETE FROM customers")
 
 def sort_bids(bids):
     return sorted(bids, key=lambda x: -x["bid_price"])
 
+def xor_key(bid):
+    """Return the (customer, group) key of a bid's XOR group, or None for a standalone bid."""
+    if bid["xor_group"]:
+        return (bid["customer"], bid["xor_group"])
+    return None
+
+# Bid prices are compared in millionths, so float rounding never decides a winner
+PRICE_SCALE = 1000000
+
+# Largest (capacity states x bid groups) table the DP solver may build, about one byte per entry
+DP_WORK_LIMIT = 100000000
+
+# Most candidate allocations find_best_allocation may enumerate
+ENUMERATION_LIMIT = 1 << 20
+
+# DP value of a capacity state that cannot afford a bid
+IMPOSSIBLE = float("-inf")
+
+def price_units(price):
+    """Return a bid price as an exact integer number of PRICE_SCALE units."""
+    return round(price * PRICE_SCALE)
+
+def group_bids(sorted_bids):
+    """
+    Group bid indices into independent choices.
+
+    A standalone bid is a group of one; the XOR alternatives of a customer share a
+    group. Groups are ordered by their first bid and alternatives keep bid order.
+
+    :param sorted_bids: List of bids sorted by descending price.
+    :return: List of groups, each a list of indices into sorted_bids.
+    """
+    groups = []
+    group_positions = {}
+    for index, bid in enumerate(sorted_bids):
+        key = xor_key(bid)
+        if key is None:
+            groups.append([index])
+        elif key in group_positions:
+            groups[group_positions[key]].append(index)
+        else:
+            group_positions[key] = len(groups)
+            groups.append([index])
+    return groups
+
 def find_best_allocation(services, sorted_bids):
+    """
+    Find the welfare-maximising allocation by enumerating one choice per bid group.
+
+    Only prod(|group| + 1) candidate allocations are tried, so XOR alternatives do
+    not multiply the search the way independent bids do.
+
+    :param services: Dictionary of available services.
+    :param sorted_bids: List of bids sorted by descending price.
+    :return: Tuple of (accepted bids, total welfare).
+    """
+    groups = group_bids(sorted_bids)
+    best_indices = []
+    best_key = (0, 0)
     max_welfare = 0
-    best_allocation = []
-    
-    for r in range(len(sorted_bids) + 1):
-        for allocation in combinations(sorted_bids, r):
-            current_allocation = []
-            service_usage = {s: 0 for s in services}
-            welfare = 0
-            
-            for bid in allocation:
-                is_valid = True
-                for service_id in bid["bundle"]:
-                    if service_usage[service_id] + 1 > services[service_id]["quantity"]:
-                        is_valid = False
-                        break
-                    service_usage[service_id] += 1
-                
-                if is_valid:
-                    current_allocation.append(bid)
-                    welfare += bid["bid_price"]
-            
-            if welfare > max_welfare:
-                max_welfare = welfare
-                best_allocation = current_allocation
-    
+
+    # Each group contributes nothing or exactly one of its bids
+    for choice in product(*[[None] + group for group in groups]):
+        indices = sorted(index for index in choice if index is not None)
+        service_usage = {s: 0 for s in services}
+        for index in indices:
+            for service_id, units in sorted_bids[index]["units"].items():
+                service_usage[service_id] += units
+        if any(service_usage[service_id] > services[service_id]["quantity"] for service_id in service_usage):
+            continue
+
+        welfare = 0
+        for index in indices:
+            welfare += sorted_bids[index]["bid_price"]
+
+        # Highest welfare wins; equal welfare prefers fewer bids, then earlier bids
+        key = (sum(price_units(sorted_bids[index]["bid_price"]) for index in indices), -len(indices))
+        if key > best_key or (key == best_key and indices < best_indices):
+            best_key = key
+            max_welfare = welfare
+            best_indices = indices
+
+    return [sorted_bids[index] for index in best_indices], max_welfare
+
+def requested_capacity(services, sorted_bids):
+    """
+    Return the usable capacity of every service the bids request.
+
+    No set of bids can use more units than are requested in total, so each
+    quantity is capped at that total without changing which allocations fit.
+
+    :param services: Dictionary of available services.
+    :param sorted_bids: List of bids.
+    :return: Dictionary mapping requested service IDs, in ID order, to usable units.
+    """
+    requested = {}
+    for bid in sorted_bids:
+        for service_id, units in bid["units"].items():
+            requested[service_id] = requested.get(service_id, 0) + units
+    return {service_id: min(max(services[service_id]["quantity"], 0), total)
+            for service_id, total in sorted(requested.items())}
+
+def capacity_state_space(services, sorted_bids):
+    """
+    Count the remaining-quantity vectors over the services requested by the bids.
+
+    :param services: Dictionary of available services.
+    :param sorted_bids: List of bids.
+    :return: Product of (usable capacity + 1) across the requested services.
+    """
+    return math.prod(cap + 1 for cap in requested_capacity(services, sorted_bids).values())
+
+def affordable_runs(need, capacity, strides):
+    """
+    List the contiguous ranges of capacity states that can still supply a bid.
+
+    :param need: Units the bid requests, one entry per capacity digit.
+    :param capacity: Quantity available per capacity digit.
+    :param strides: Mixed-radix weight of each capacity digit.
+    :return: List of (start, stop) state ranges with enough of every requested service.
+    """
+    if any(units > cap for units, cap in zip(need, capacity)):
+        return []
+    # Digits below the lowest requested one are unconstrained, so each run spans them fully
+    low = min(i for i, units in enumerate(need) if units)
+    start = need[low] * strides[low]
+    length = (capacity[low] + 1 - need[low]) * strides[low]
+    higher = [range(need[i], capacity[i] + 1) for i in range(low + 1, len(need))]
+    runs = []
+    for digits in product(*higher):
+        base = start + sum(digit * strides[i] for i, digit in zip(range(low + 1, len(need)), digits))
+        runs.append((base, base + length))
+    return runs
+
+def find_best_allocation_dp(services, sorted_bids):
+    """
+    Find the welfare-maximising allocation by dynamic programming over remaining capacities.
+
+    Runs in time and memory proportional to the capacity state space times the
+    number of bid groups, rather than 2^bids. It compares allocations exactly as
+    find_best_allocation does: highest welfare in price_units, then fewest bids,
+    then earliest bids in sorted order, and sums max_welfare over the accepted bids
+    in that order. Without XOR groups both solvers return identical results; a tie
+    between XOR alternatives may resolve to a different allocation of equal welfare,
+    since each XOR group is decided at the position of its first bid.
+
+    :param services: Dictionary of available services.
+    :param sorted_bids: List of bids sorted by descending price.
+    :return: Tuple of (accepted bids, total welfare).
+    """
+    usable = requested_capacity(services, sorted_bids)
+    requested = list(usable)
+    capacity = list(usable.values())
+    position = {service_id: i for i, service_id in enumerate(requested)}
+
+    # A remaining-capacity vector is one mixed-radix integer; the full capacity is the last state
+    strides = []
+    size = 1
+    for cap in capacity:
+        strides.append(size)
+        size *= cap + 1
+
+    # Values are price_units * scale - bid count: more welfare first, then fewer bids
+    scale = len(sorted_bids) + 1
+    plans = []
+    runs_by_need = {}
+    for bid in sorted_bids:
+        need = [0] * len(requested)
+        for service_id, units in bid["units"].items():
+            need[position[service_id]] = units
+        need = tuple(need)
+        if need not in runs_by_need:
+            runs_by_need[need] = affordable_runs(need, capacity, strides)
+        offset = sum(units * stride for units, stride in zip(need, strides))
+        plans.append((offset, runs_by_need[need], price_units(bid["bid_price"]) * scale - 1))
+
+    # Backward pass, one flat value array per layer; only a compact choice table is kept per group
+    groups = group_bids(sorted_bids)
+    best = [0] * size
+    choices = []
+    for group in reversed(groups):
+        current = best
+        choice = bytes(size)
+        # Later alternatives first, so on ties the earlier bid overwrites them
+        for alternative in range(len(group), 0, -1):
+            offset, runs, gain = plans[group[alternative - 1]]
+            candidate = [IMPOSSIBLE] * size
+            for start, stop in runs:
+                candidate[start:stop] = map(add, best[start - offset:stop - offset], repeat(gain))
+            # >= prefers taking the bid over skipping it when both are worth the same
+            taken = bytes(map(ge, candidate, current))
+            current = list(map(max, candidate, current))
+            if len(group) == 1:
+                choice = taken
+            else:
+                choice = array("H", (alternative if take else previous for take, previous in zip(taken, choice)))
+        best = current
+        choices.append(choice)
+    choices.reverse()
+
+    chosen = []
+    state = size - 1
+    for group, choice in zip(groups, choices):
+        if choice[state]:
+            index = group[choice[state] - 1]
+            chosen.append(index)
+            state -= plans[index][0]
+
+    best_allocation = [sorted_bids[index] for index in sorted(chosen)]
+    max_welfare = 0
+    for bid in best_allocation:
+        max_welfare += bid["bid_price"]
     return best_allocation, max_welfare
 
+def solve_allocation(services, sorted_bids):
+    """
+    Choose the allocation solver suited to the market.
+
+    The capacity DP costs about (capacity states x bid groups) steps and memory,
+    enumeration prod(|group| + 1) candidates; the cheaper solver within its limit
+    is used.
+
+    :raises ValueError: If the market exceeds both DP_WORK_LIMIT and ENUMERATION_LIMIT.
+    """
+    groups = group_bids(sorted_bids)
+    dp_work = capacity_state_space(services, sorted_bids) * len(groups)
+    enumeration_work = math.prod(len(group) + 1 for group in groups)
+
+    options = []
+    if dp_work <= DP_WORK_LIMIT:
+        options.append((dp_work, find_best_allocation_dp))
+    if enumeration_work <= ENUMERATION_LIMIT:
+        options.append((enumeration_work, find_best_allocation))
+    if not options:
+        raise ValueError(f"Market too large to solve: {dp_work} capacity states x bid groups "
+                         f"and {enumeration_work} bid combinations exceed the solver limits.")
+    solver = min(options, key=lambda option: option[0])[1]
+    return solver(services, sorted_bids)
+
 def update_prices(services, allocation, alpha=0.1):
     """
     Update the prices of services based on demand and supply.
@@ -147,8 +533,8 @@ def update_prices(services, allocation, alpha=0.1):
     
     # Count the demand for each service from the accepted bids
     for bid in allocation:
-        for service_id in bid["bundle"]:
-            demand_count[service_id] += 1
+        for service_id, units in bid["units"].items():
+            demand_count[service_id] += units
     
     # Update the price of each service based on its demand vs. supply
     for service_id, details in services.items():
@@ -160,61 +546,59 @@ def update_prices(services, allocation, alpha=0.1):
         else:
             details["updated_price"] = details["initial_price"] * (1 - alpha) ** max(0, (supply - demand))
 
-def calculate_winner_prices(allocation, services):
-    """
-    Calculate the final price for each winning bid based on updated service prices.
-
-    :param allocation: List of winning bids.
-    :param services: Dictionary of available services with updated prices.
-    :return: Dictionary mapping each customer to their total price.
+def settle_auction(allocation, remove_winners):
     """
-    winner_prices = {}
-    for bid in allocation:
-        total_price = sum(services[service_id]["updated_price"] for service_id in bid["bundle"])
-        winner_prices[bid["customer"]] = total_price
-    return winner_prices
+    Apply the outcome of an auction in a single transaction.
 
+    Sibling alternatives of every winning XOR bid are always retired, so a customer
+    cannot win a second alternative of the same group in a later auction.
 
-def update_service_quantities(allocation):
-    for bid in allocation:
-        for service_id in bid["bundle"]:
-            cursor.execute("UPDATE services SET quantity = quantity - 1 WHERE id = ?", (service_id,))
-    conn.commit()
+    Readers see either the state before the auction or the fully settled state,
+    never quantities already deducted while the winning bids are still open.
 
-def remove_winning_bids(allocation):
-    for bid in allocation:
-        cursor.execute("DELETE FROM bids WHERE id = ?", (bid["id"],))
-    conn.commit()
+    :param allocation: List of accepted bids.
+    :param remove_winners: Whether to delete the winning bids from the bid list.
+    :return: Sorted list of the IDs of services whose quantity changed.
+    """
+    changed_ids = set()
+    with db.writer() as cursor:
+        for bid in allocation:
+            for service_id, units in bid["units"].items():
+                cursor.execute("UPDATE services SET quantity = quantity - ? WHERE id = ?", (units, service_id))
+                changed_ids.add(service_id)
+            if remove_winners:
+                cursor.execute("DELETE FROM bids WHERE id = ?", (bid["id"],))
+            # The losing alternatives of a won XOR group must not win a later auction
+            if xor_key(bid) is not None:
+                cursor.execute("DELETE FROM bids WHERE customer = ? AND xor_group = ? AND id != ?",
+                               (bid["customer"], bid["xor_group"], bid["id"]))
+    return sorted(changed_ids)
 
 def resolve_conflicts():
     services = fetch_services()
     bids = fetch_bids()
 
     sorted_bids = sort_bids(bids)
-    best_allocation, max_welfare = find_best_allocation(services, sorted_bids)
+    best_allocation, max_welfare = solve_allocation(services, sorted_bids)
     update_prices(services, best_allocation)
-    winner_prices = calculate_winner_prices(best_allocation, services)
 
     result = f"Total Welfare: {max_welfare}\n\nAccepted Bids and Prices:\n"
     for bid in best_allocation:
-        bundle_names = [services[service_id]['name'] for service_id in bid['bundle']]
-        total_price = sum(services[service_id]['updated_price'] for service_id in bid['bundle'])
         result += (f"Customer: {bid['customer']}, Bid Price: {bid['bid_price']}, "
-                   f"Bundle: {bundle_names}, Total Price to Pay: {total_price}\n")
+                   f"Bundle: {bundle_names(bid, services)}, Total Price to Pay: {bundle_price(bid, services)}\n")
     
     result += "\nRejected Bids:\n"
     for bid in sorted_bids:
         if bid not in best_allocation:
-            bundle_names = [services[service_id]['name'] for service_id in bid['bundle']]
             result += (f"Customer: {bid['customer']}, Bid Price: {bid['bid_price']}, "
-                       f"Bundle: {bundle_names}\n")
+                       f"Bundle: {bundle_names(bid, services)}\n")
 
-    update_service_quantities(best_allocation)
-    if messagebox.askyesno("Remove Winning Bids", "Do you want to remove winning bids from the bid list?"):
-        remove_winning_bids(best_allocation)
+    remove_winners = messagebox.askyesno("Remove Winning Bids", "Do you want to remove winning bids from the bid list?")
+    changed_ids = settle_auction(best_allocation, remove_winners)
+    if remove_winners:
         result += "\nWinning bids removed from the bid list."
 
-    return result
+    return result, changed_ids
 
 class AuctionApp:
     def __init__(self, root):
@@ -277,14 +661,17 @@ class AuctionApp:
         self.bid_customer_name_var = StringVar()
         self.bid_price_var = StringVar()
         self.selected_services_var = StringVar()
+        self.xor_group_var = StringVar()
 
         Label(self.frame, text="Bid Customer Name:").grid(row=7, column=0, padx=5, pady=5)
         Entry(self.frame, textvariable=self.bid_customer_name_var).grid(row=7, column=1, padx=5, pady=5)
         Label(self.frame, text="Bid Price:").grid(row=8, column=0, padx=5, pady=5)
         Entry(self.frame, textvariable=self.bid_price_var).grid(row=8, column=1, padx=5, pady=5)
-        Label(self.frame, text="Selected Services (comma-separated):").grid(row=9, column=0, padx=5, pady=5)
+        Label(self.frame, text="Selected Services (comma-separated, id:units):").grid(row=9, column=0, padx=5, pady=5)
         Entry(self.frame, textvariable=self.selected_services_var).grid(row=9, column=1, padx=5, pady=5)
-        Button(self.frame, text="Add Bid", command=self.add_bid).grid(row=10, column=1, padx=5, pady=5)
+        Label(self.frame, text="XOR Group (optional):").grid(row=10, column=0, padx=5, pady=5)
+        Entry(self.frame, textvariable=self.xor_group_var).grid(row=10, column=1, padx=5, pady=5)
+        Button(self.frame, text="Add Bid", command=self.add_bid).grid(row=10, column=2, padx=5, pady=5)
 
         # Actions
         Button(self.frame, text="View Services", command=self.view_services).grid(row=11, column=1, padx=5, pady=5)
@@ -293,6 +680,7 @@ class AuctionApp:
         Button(self.frame, text="Clear All Data and Restart", command=self.restart_app).grid(row=14, column=1, padx=5, pady=5)
 
         # Service Selection for Bundles
+        self.listed_service_ids = []  # Service ID shown at each listbox row
         self.service_listbox = Listbox(self.frame, selectmode=SINGLE, width=80)  # Increased width here
         self.service_listbox.grid(row=15, column=0, columnspan=3, padx=5, pady=5)
         self.service_listbox.bind('<<ListboxSelect>>', self.on_service_select)
@@ -319,9 +707,9 @@ class AuctionApp:
         try:
             quantity = int(quantity)
             initial_price = float(initial_price)
-            add_service(provider_id, service_name, quantity, initial_price)
+            service_id = add_service(provider_id, service_name, quantity, initial_price)
             messagebox.showinfo("Service Added", f"Service '{service_name}' added successfully.")
-            self.update_service_list()
+            self.update_service_list([service_id])
         except ValueError:
             messagebox.showwarning("Input Error", "Invalid quantity or initial price.")
 
@@ -337,6 +725,7 @@ class AuctionApp:
         customer_name = self.bid_customer_name_var.get()
         bid_price = self.bid_price_var.get()
         selected_services = self.selected_services_var.get()
+        xor_group = self.xor_group_var.get().strip()
 
         if not customer_name or not bid_price or not selected_services:
             messagebox.showwarning("Input Error", "All fields must be filled.")
@@ -344,8 +733,12 @@ class AuctionApp:
 
         try:
             bid_price = float(bid_price)
-            selected_services = list(map(int, selected_services.split(',')))
-            add_bid(customer_name, bid_price, selected_services)
+            selected_services = parse_bundle(selected_services)
+            services = fetch_services()
+            if not all(service_id in services for service_id in selected_services):
+                messagebox.showwarning("Input Error", "One or more service IDs are invalid.")
+                return
+            add_bid(customer_name, bid_price, selected_services, xor_group)
             messagebox.showinfo("Bid Added", "Bid added successfully.")
         except ValueError:
             messagebox.showwarning("Input Error", "Invalid bid price or service IDs.")
@@ -356,9 +749,13 @@ class AuctionApp:
         messagebox.showinfo("Service List", f"\n{table_str}")
 
     def start_auction(self):
-        result = resolve_conflicts()  # This runs the auction process
+        try:
+            result, changed_ids = resolve_conflicts()  # This runs the auction process
+        except ValueError as e:
+            messagebox.showerror("Auction Error", str(e))
+            return
         messagebox.showinfo("Auction Result", result)
-        self.update_service_list()  # Refresh the service list to reflect changes
+        self.update_service_list(changed_ids)  # Refresh the rows of services the auction changed
 
 
     def clear_all_bids(self):
@@ -373,16 +770,35 @@ class AuctionApp:
         self.root.destroy()  # Ensure the Tkinter main loop is stopped
         self.__init__(Tk())  # Restart the application
 
-    def update_service_list(self):
-        self.service_listbox.delete(0, END)
-        services = fetch_services()
-        for service_id, details in services.items():
-            if details["quantity"] > 0:
-                # Updated line: include the quantity of the service in the listbox entry
-                self.service_listbox.insert(
-                    END, 
-                    f"{service_id}: {details['name']} (Price: {details['updated_price']}, Quantity: {details['quantity']})"
-                )   
+    def update_service_list(self, changed_ids=None):
+        """
+        Refresh the service listbox.
+
+        :param changed_ids: IDs of services changed since the last refresh; only their rows
+                            are redrawn. None reloads the whole list.
+        """
+        if changed_ids is None:
+            self.service_listbox.delete(0, END)
+            self.listed_service_ids = []
+            for row in fetch_available_services():
+                self.listed_service_ids.append(row[0])
+                self.service_listbox.insert(END, self.format_service_entry(row))
+            return
+
+        rows = {row[0]: row for row in fetch_available_services(changed_ids)}
+        for service_id in sorted(set(changed_ids)):
+            # listed_service_ids mirrors the listbox order, so the row index is a bisection away
+            index = bisect_left(self.listed_service_ids, service_id)
+            if index < len(self.listed_service_ids) and self.listed_service_ids[index] == service_id:
+                self.service_listbox.delete(index)
+                del self.listed_service_ids[index]
+            if service_id in rows:
+                self.service_listbox.insert(index, self.format_service_entry(rows[service_id]))
+                self.listed_service_ids.insert(index, service_id)
+
+    def format_service_entry(self, row):
+        service_id, name, price, quantity = row
+        return f"{service_id}: {name} (Price: {price}, Quantity: {quantity})"
 
     def update_service_quantity(self):
         service_id = self.update_service_id_var.get()
@@ -399,11 +815,11 @@ class AuctionApp:
                 return
 
             # Update the service quantity in the database
-            cursor.execute("UPDATE services SET quantity = ? WHERE id = ?", (new_quantity, service_id))
-            conn.commit()
+            with db.writer() as cursor:
+                cursor.execute("UPDATE services SET quantity = ? WHERE id = ?", (new_quantity, service_id))
 
             messagebox.showinfo("Quantity Updated", f"Service ID {service_id} quantity updated to {new_quantity}.")
-            self.update_service_list()  # Refresh the service list
+            self.update_service_list([service_id])  # Refresh the updated row
         except ValueError:
             messagebox.showwarning("Input Error", "Invalid quantity. Please enter a valid integer.")
         except sqlite3.Error as e:
@@ -423,4 +839,4 @@ app = AuctionApp(root)
 root.mainloop()
 
 # Close the database connection when done
-conn.close()
+db.close()
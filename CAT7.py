@@ -1,67 +1,196 @@
+import math
+from array import array
 import sqlite3
-from itertools import combinations
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from queue import Queue, Empty
+from itertools import product, repeat
+from operator import add, ge
 from tabulate import tabulate
 
+class ConnectionManager:
+    """
+    Manage the SQLite connections used by the auction engine.
+
+    The database runs in WAL journal mode, so readers see the last committed
+    state and never wait on a settlement in progress. All writes go through a
+    single dedicated connection serialised by a lock, while views and reporting
+    borrow read-only connections from a pool and may run from any thread.
+    """
+
+    def __init__(self, path, pool_size=4):
+        """
+        :param path: Path of the SQLite database file.
+        :param pool_size: Maximum number of pooled read-only connections.
+        """
+        self.path = path
+        self.pool_size = pool_size
+        self._write_lock = threading.Lock()
+        self._pool_lock = threading.Lock()
+        self._readers = Queue()
+        self._reader_count = 0
+
+        self._writer = self._connect()
+        self._writer.execute("PRAGMA journal_mode=WAL")
+        self._writer.execute("PRAGMA wal_autocheckpoint=1000")
+
+    def _connect(self, read_only=False):
+        if read_only:
+            uri = Path(self.path).resolve().as_uri() + "?mode=ro"
+            connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            connection.execute("PRAGMA query_only=ON")
+        else:
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            # NORMAL is durable across application crashes in WAL mode
+            connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA busy_timeout=5000")
+        connection.execute("PRAGMA temp_store=MEMORY")
+        connection.execute("PRAGMA cache_size=-8000")
+        return connection
+
+    def _acquire_reader(self):
+        try:
+            return self._readers.get_nowait()
+        except Empty:
+            pass
+        with self._pool_lock:
+            if self._reader_count < self.pool_size:
+                self._reader_count += 1
+                return self._connect(read_only=True)
+        # Pool exhausted: wait for another thread to hand a connection back
+        return self._readers.get()
+
+    @contextmanager
+    def reader(self):
+        """Borrow a read-only cursor from the pool."""
+        connection = self._acquire_reader()
+        cursor = connection.cursor()
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+            self._readers.put(connection)
+
+    @contextmanager
+    def writer(self):
+        """Yield a cursor on the writer connection; commit on success, roll back on error."""
+        with self._write_lock:
+            cursor = self._writer.cursor()
+            try:
+                yield cursor
+                self._writer.commit()
+            except BaseException:
+                self._writer.rollback()
+                raise
+            finally:
+                cursor.close()
+
+    def close(self):
+        with self._pool_lock:
+            while not self._readers.empty():
+                self._readers.get_nowait().close()
+            self._reader_count = 0
+        with self._write_lock:
+            self._writer.close()
+
 # Connect to SQLite database (or create it if it doesn't exist)
-conn = sqlite3.connect('auction_engine2.db')
-cursor = conn.cursor()
-
-# Create tables if not already created
-cursor.execute('''CREATE TABLE IF NOT EXISTS service_providers (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL
-                )''')
-
-cursor.execute('''CREATE TABLE IF NOT EXISTS services (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    provider_id INTEGER NOT NULL,
-                    name TEXT NOT NULL,
-                    quantity INTEGER NOT NULL,
-                    initial_price REAL DEFAULT 10.0,
-                    FOREIGN KEY (provider_id) REFERENCES service_providers(id)
-                )''')
-
-cursor.execute('''CREATE TABLE IF NOT EXISTS bids (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    customer TEXT NOT NULL,
-                    bid_price REAL NOT NULL,
-                    bundle TEXT NOT NULL
-                )''')
-
-cursor.execute('''CREATE TABLE IF NOT EXISTS customers (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL
-                )''')
-
-conn.commit()
+db = ConnectionManager('auction_engine2.db')
+
+with db.writer() as cursor:
+    # Create tables if not already created
+    cursor.execute('''CREATE TABLE IF NOT EXISTS service_providers (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        name TEXT NOT NULL
+                    )''')
+
+    cursor.execute('''CREATE TABLE IF NOT EXISTS services (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        provider_id INTEGER NOT NULL,
+                        name TEXT NOT NULL,
+                        quantity INTEGER NOT NULL,
+                        initial_price REAL DEFAULT 10.0,
+                        FOREIGN KEY (provider_id) REFERENCES service_providers(id)
+                    )''')
+
+    cursor.execute('''CREATE TABLE IF NOT EXISTS bids (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        customer TEXT NOT NULL,
+                        bid_price REAL NOT NULL,
+                        bundle TEXT NOT NULL,
+                        xor_group TEXT
+                    )''')
+
+    cursor.execute('''CREATE TABLE IF NOT EXISTS customers (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        name TEXT NOT NULL
+                    )''')
+
+    # Databases created before XOR bid groups existed lack the column
+    cursor.execute("PRAGMA table_info(bids)")
+    if "xor_group" not in [column[1] for column in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE bids ADD COLUMN xor_group TEXT")
 
 # Fetch all services and their quantities from the database
 def fetch_services():
-    cursor.execute("SELECT * FROM services")
-    rows = cursor.fetchall()
+    with db.reader() as cursor:
+        cursor.execute("SELECT * FROM services")
+        rows = cursor.fetchall()
     print(f"Debug: Fetching services, rows fetched: {rows}")  # Debugging line
     return {row[0]: {"provider_id": row[1], "name": row[2], "quantity": row[3], "initial_price": row[4], "updated_price": row[4]} for row in rows}
 
 # Fetch all service providers from the database
 def fetch_service_providers():
-    cursor.execute("SELECT * FROM service_providers")
-    return {row[0]: row[1] for row in cursor.fetchall()}
+    with db.reader() as cursor:
+        cursor.execute("SELECT * FROM service_providers")
+        rows = cursor.fetchall()
+    return {row[0]: row[1] for row in rows}
+
+# Parse a compact bundle string ("3,5:2") into a {service_id: units} mapping
+def parse_bundle(bundle):
+    units = {}
+    for entry in bundle.split(','):
+        service_id, _, count = entry.partition(':')
+        count = int(count) if count else 1
+        if count < 1:
+            raise ValueError(f"Invalid unit count in bundle entry '{entry}'")
+        service_id = int(service_id)
+        units[service_id] = units.get(service_id, 0) + count
+    return units
+
+# Encode a {service_id: units} mapping back into its compact bundle string
+def encode_bundle(units):
+    return ",".join(str(service_id) if count == 1 else f"{service_id}:{count}"
+                    for service_id, count in units.items())
+
+# Price of a bid's bundle at the services' updated prices, counting every unit
+def bundle_price(bid, services):
+    return sum(services[service_id]["updated_price"] * units for service_id, units in bid["units"].items())
+
+# Human-readable bundle contents, e.g. ["Hotel A x2", "Taxi"]
+def bundle_names(bid, services):
+    return [services[service_id]['name'] if units == 1 else f"{services[service_id]['name']} x{units}"
+            for service_id, units in bid["units"].items()]
 
 # Fetch all bids from the database
 def fetch_bids():
-    cursor.execute("SELECT * FROM bids")
-    rows = cursor.fetchall()
-    return [{"id": row[0], "customer": row[1], "bid_price": row[2], "bundle": list(map(int, row[3].split(',')))} for row in rows]
+    with db.reader() as cursor:
+        cursor.execute("SELECT id, customer, bid_price, bundle, xor_group FROM bids")
+        rows = cursor.fetchall()
+    bids = []
+    for row in rows:
+        units = parse_bundle(row[3])
+        bids.append({"id": row[0], "customer": row[1], "bid_price": row[2],
+                     "bundle": list(units), "units": units, "xor_group": row[4]})
+    return bids
 
 def view_services():
     print("\n--- Available Services ---")
-    services = fetch_services()
-    service_providers = fetch_service_providers()
-    
-    table = []
-    for service_id, details in services.items():
-        provider_name = service_providers.get(details['provider_id'], 'Unknown')
-        table.append([service_id, details['name'], provider_name, details['quantity'], details['initial_price']])
+    with db.reader() as cursor:
+        cursor.execute("""SELECT s.id, s.name, COALESCE(p.name, 'Unknown'), s.quantity, s.initial_price
+                          FROM services s LEFT JOIN service_providers p ON p.id = s.provider_id
+                          ORDER BY s.id""")
+        table = [list(row) for row in cursor.fetchall()]
     
     headers = ["ID", "Name", "Provider", "Quantity", "Initial Price"]
     print(tabulate(table, headers=headers, tablefmt="grid"))
@@ -70,12 +199,10 @@ def view_services():
 def add_service_provider():
     print("\nAdd Service Provider:")
     provider_name = input("Enter Service Provider Name: ")
-    cursor.execute("INSERT INTO service_providers (name) VALUES (?)", (provider_name,))
-    conn.commit()
-    
-    # Fetch the ID of the newly added provider
-    cursor.execute("SELECT id FROM service_providers WHERE name = ?", (provider_name,))
-    provider_id = cursor.fetchone()[0]
+    with db.writer() as cursor:
+        cursor.execute("INSERT INTO service_providers (name) VALUES (?)", (provider_name,))
+        # ID of the newly added provider
+        provider_id = cursor.lastrowid
     
     print(f"Service Provider '{provider_name}' added successfully with ID {provider_id}.\n")
 
@@ -83,17 +210,19 @@ def add_service():
     try:
         print("\nAdd Service:")
         provider_id = int(input("Enter Service Provider ID: "))
-        cursor.execute("SELECT id FROM service_providers WHERE id = ?", (provider_id,))
-        if not cursor.fetchone():
+        with db.reader() as cursor:
+            cursor.execute("SELECT id FROM service_providers WHERE id = ?", (provider_id,))
+            provider_exists = cursor.fetchone() is not None
+        if not provider_exists:
             print("Invalid Service Provider ID.")
             return
 
         service_name = input("Enter Service Name: ")
         quantity = int(input("Enter Quantity: "))
         initial_price = float(input("Enter Initial Price: "))
-        cursor.execute("INSERT INTO services (provider_id, name, quantity, initial_price) VALUES (?, ?, ?, ?)",
-                       (provider_id, service_name, quantity, initial_price))
-        conn.commit()
+        with db.writer() as cursor:
+            cursor.execute("INSERT INTO services (provider_id, name, quantity, initial_price) VALUES (?, ?, ?, ?)",
+                           (provider_id, service_name, quantity, initial_price))
         print(f"Service '{service_name}' added successfully.\n")
     except Exception as e:
         print(f"Error adding service: {e}\n")
@@ -104,9 +233,9 @@ def update_service_list():
     try:
         new_quantity = int(input("Enter New Quantity: "))
         new_price = float(input("Enter New Initial Price: "))
-        cursor.execute("UPDATE services SET quantity = ?, initial_price = ? WHERE id = ?", 
-                       (new_quantity, new_price, service_id))
-        conn.commit()
+        with db.writer() as cursor:
+            cursor.execute("UPDATE services SET quantity = ?, initial_price = ? WHERE id = ?", 
+                           (new_quantity, new_price, service_id))
         print(f"Service ID {service_id} updated successfully.\n")
     except Exception as e:
         print(f"Error updating service: {e}\n")
@@ -114,15 +243,16 @@ def update_service_list():
 def add_customer():
     print("\nAdd Customer:")
     customer_name = input("Enter Customer Name: ")
-    cursor.execute("INSERT INTO customers (name) VALUES (?)", (customer_name,))
-    conn.commit()
+    with db.writer() as cursor:
+        cursor.execute("INSERT INTO customers (name) VALUES (?)", (customer_name,))
     print(f"Customer '{customer_name}' added successfully.\n")
 
 def add_bid():
     try:
         print("\n--- Add Bundle Bid ---")
-        cursor.execute("SELECT * FROM customers")
-        customers = cursor.fetchall()
+        with db.reader() as cursor:
+            cursor.execute("SELECT * FROM customers")
+            customers = cursor.fetchall()
         print("Customers:")
         for customer in customers:
             print(f"{customer[0]}: {customer[1]}")
@@ -131,19 +261,20 @@ def add_bid():
 
         view_services()  # Show available services
 
-        selected_services = input("Enter Service IDs for Bundle (comma-separated): ").split(',')
-        selected_services = [int(s) for s in selected_services]
+        selected_services = parse_bundle(input("Enter Service IDs for Bundle (comma-separated, id:units for several units): "))
 
-        if not all(service_id in fetch_services() for service_id in selected_services):
+        services = fetch_services()
+        if not all(service_id in services for service_id in selected_services):
             print("One or more service IDs are invalid.")
             return
 
         bid_price = float(input("Enter Bid Price: "))
-        bundle = ",".join(map(str, selected_services))
+        xor_group = input("Enter XOR Group (optional, only one bid per group can win): ").strip()
+        bundle = encode_bundle(selected_services)
 
-        cursor.execute("INSERT INTO bids (customer, bid_price, bundle) VALUES (?, ?, ?)",
-                       (customer_name, bid_price, bundle))
-        conn.commit()
+        with db.writer() as cursor:
+            cursor.execute("INSERT INTO bids (customer, bid_price, bundle, xor_group) VALUES (?, ?, ?, ?)",
+                           (customer_name, bid_price, bundle, xor_group or None))
         print(f"Bid by '{customer_name}' added successfully.\n")
     except Exception as e:
         print(f"Error adding bid: {e}\n")
@@ -152,45 +283,198 @@ def add_bid():
 def sort_bids(bids):
     return sorted(bids, key=lambda x: -x["bid_price"])
 
-# Backtracking function to find the best allocation maximizing total welfare
+# Key of the XOR group a bid belongs to, or None for a standalone bid
+def xor_key(bid):
+    if bid["xor_group"]:
+        return (bid["customer"], bid["xor_group"])
+    return None
+
+# Bid prices are compared in millionths, so float rounding never decides a winner
+PRICE_SCALE = 1000000
+
+# Largest (capacity states x bid groups) table the DP solver may build, about one byte per entry
+DP_WORK_LIMIT = 100000000
+
+# Most candidate allocations find_best_allocation may enumerate
+ENUMERATION_LIMIT = 1 << 20
+
+# DP value of a capacity state that cannot afford a bid
+IMPOSSIBLE = float("-inf")
+
+# A bid price as an exact integer number of PRICE_SCALE units
+def price_units(price):
+    return round(price * PRICE_SCALE)
+
+# Group bid indices into independent choices: a standalone bid is a group of one, the XOR
+# alternatives of a customer share a group; groups follow their first bid's order
+def group_bids(sorted_bids):
+    groups = []
+    group_positions = {}
+    for index, bid in enumerate(sorted_bids):
+        key = xor_key(bid)
+        if key is None:
+            groups.append([index])
+        elif key in group_positions:
+            groups[group_positions[key]].append(index)
+        else:
+            group_positions[key] = len(groups)
+            groups.append([index])
+    return groups
+
+# Find the best allocation maximizing total welfare by trying one choice per bid group,
+# i.e. prod(|group| + 1) candidates instead of every subset of bids
 def find_best_allocation(services, sorted_bids):
+    groups = group_bids(sorted_bids)
+    best_indices = []
+    best_key = (0, 0)
     max_welfare = 0
-    best_allocation = []
-    
-    # Iterate over all possible allocations of bids
-    for r in range(len(sorted_bids) + 1):
-        for allocation in combinations(sorted_bids, r):
-            current_allocation = []
-            service_usage = {s: 0 for s in services}
-            welfare = 0
-            
-            # Check if the allocation is valid and calculate welfare
-            for bid in allocation:
-                is_valid = True
-                for service_id in bid["bundle"]:
-                    if service_usage[service_id] + 1 > services[service_id]["quantity"]:
-                        is_valid = False
-                        break
-                    service_usage[service_id] += 1
-                
-                if is_valid:
-                    current_allocation.append(bid)
-                    welfare += bid["bid_price"]
-            
-            # Update best allocation if welfare is maximized
-            if welfare > max_welfare:
-                max_welfare = welfare
-                best_allocation = current_allocation
-    
+
+    # Each group contributes nothing or exactly one of its bids
+    for choice in product(*[[None] + group for group in groups]):
+        indices = sorted(index for index in choice if index is not None)
+        service_usage = {s: 0 for s in services}
+        for index in indices:
+            for service_id, units in sorted_bids[index]["units"].items():
+                service_usage[service_id] += units
+        if any(service_usage[service_id] > services[service_id]["quantity"] for service_id in service_usage):
+            continue
+
+        welfare = 0
+        for index in indices:
+            welfare += sorted_bids[index]["bid_price"]
+
+        # Highest welfare wins; equal welfare prefers fewer bids, then earlier bids
+        key = (sum(price_units(sorted_bids[index]["bid_price"]) for index in indices), -len(indices))
+        if key > best_key or (key == best_key and indices < best_indices):
+            best_key = key
+            max_welfare = welfare
+            best_indices = indices
+
+    return [sorted_bids[index] for index in best_indices], max_welfare
+
+# Usable capacity of every requested service, in ID order: no set of bids can use more units
+# than are requested in total, so capping quantities there does not change which allocations fit
+def requested_capacity(services, sorted_bids):
+    requested = {}
+    for bid in sorted_bids:
+        for service_id, units in bid["units"].items():
+            requested[service_id] = requested.get(service_id, 0) + units
+    return {service_id: min(max(services[service_id]["quantity"], 0), total)
+            for service_id, total in sorted(requested.items())}
+
+# Number of remaining-quantity vectors over the services requested by the bids
+def capacity_state_space(services, sorted_bids):
+    return math.prod(cap + 1 for cap in requested_capacity(services, sorted_bids).values())
+
+# Contiguous (start, stop) ranges of capacity states that have enough of every service a bid needs
+def affordable_runs(need, capacity, strides):
+    if any(units > cap for units, cap in zip(need, capacity)):
+        return []
+    # Digits below the lowest requested one are unconstrained, so each run spans them fully
+    low = min(i for i, units in enumerate(need) if units)
+    start = need[low] * strides[low]
+    length = (capacity[low] + 1 - need[low]) * strides[low]
+    higher = [range(need[i], capacity[i] + 1) for i in range(low + 1, len(need))]
+    runs = []
+    for digits in product(*higher):
+        base = start + sum(digit * strides[i] for i, digit in zip(range(low + 1, len(need)), digits))
+        runs.append((base, base + length))
+    return runs
+
+# Dynamic programming over remaining capacities in time and memory of (states x bid groups).
+# Compares allocations exactly as find_best_allocation does (welfare in price_units, then fewest
+# bids, then earliest bids), so results are identical without XOR groups; a tie between XOR
+# alternatives may pick a different allocation of equal welfare.
+def find_best_allocation_dp(services, sorted_bids):
+    usable = requested_capacity(services, sorted_bids)
+    requested = list(usable)
+    capacity = list(usable.values())
+    position = {service_id: i for i, service_id in enumerate(requested)}
+
+    # A remaining-capacity vector is one mixed-radix integer; the full capacity is the last state
+    strides = []
+    size = 1
+    for cap in capacity:
+        strides.append(size)
+        size *= cap + 1
+
+    # Values are price_units * scale - bid count: more welfare first, then fewer bids
+    scale = len(sorted_bids) + 1
+    plans = []
+    runs_by_need = {}
+    for bid in sorted_bids:
+        need = [0] * len(requested)
+        for service_id, units in bid["units"].items():
+            need[position[service_id]] = units
+        need = tuple(need)
+        if need not in runs_by_need:
+            runs_by_need[need] = affordable_runs(need, capacity, strides)
+        offset = sum(units * stride for units, stride in zip(need, strides))
+        plans.append((offset, runs_by_need[need], price_units(bid["bid_price"]) * scale - 1))
+
+    # Backward pass, one flat value array per layer; only a compact choice table is kept per group
+    groups = group_bids(sorted_bids)
+    best = [0] * size
+    choices = []
+    for group in reversed(groups):
+        current = best
+        choice = bytes(size)
+        # Later alternatives first, so on ties the earlier bid overwrites them
+        for alternative in range(len(group), 0, -1):
+            offset, runs, gain = plans[group[alternative - 1]]
+            candidate = [IMPOSSIBLE] * size
+            for start, stop in runs:
+                candidate[start:stop] = map(add, best[start - offset:stop - offset], repeat(gain))
+            # >= prefers taking the bid over skipping it when both are worth the same
+            taken = bytes(map(ge, candidate, current))
+            current = list(map(max, candidate, current))
+            if len(group) == 1:
+                choice = taken
+            else:
+                choice = array("H", (alternative if take else previous for take, previous in zip(taken, choice)))
+        best = current
+        choices.append(choice)
+    choices.reverse()
+
+    chosen = []
+    state = size - 1
+    for group, choice in zip(groups, choices):
+        if choice[state]:
+            index = group[choice[state] - 1]
+            chosen.append(index)
+            state -= plans[index][0]
+
+    best_allocation = [sorted_bids[index] for index in sorted(chosen)]
+    max_welfare = 0
+    for bid in best_allocation:
+        max_welfare += bid["bid_price"]
     return best_allocation, max_welfare
 
+# Use the cheaper solver within its limit: the capacity DP (states x groups) or enumeration
+# (prod(|group| + 1)); raise ValueError when the market exceeds both
+def solve_allocation(services, sorted_bids):
+    groups = group_bids(sorted_bids)
+    dp_work = capacity_state_space(services, sorted_bids) * len(groups)
+    enumeration_work = math.prod(len(group) + 1 for group in groups)
+
+    options = []
+    if dp_work <= DP_WORK_LIMIT:
+        options.append((dp_work, find_best_allocation_dp))
+    if enumeration_work <= ENUMERATION_LIMIT:
+        options.append((enumeration_work, find_best_allocation))
+    if not options:
+        raise ValueError(f"Market too large to solve: {dp_work} capacity states x bid groups "
+                         f"and {enumeration_work} bid combinations exceed the solver limits.")
+    solver = min(options, key=lambda option: option[0])[1]
+    return solver(services, sorted_bids)
+
 # Update prices based on demand and supply for the allocated services
 def update_prices(services, allocation, alpha=0.1):
     # Calculate demand for each service based on the allocation
     demand_count = {s: 0 for s in services}
     for bid in allocation:
-        for service_id in bid["bundle"]:
-            demand_count[service_id] += 1
+        for service_id, units in bid["units"].items():
+            demand_count[service_id] += units
     
     # Update prices based on demand and supply
     for service_id, details in services.items():
@@ -201,26 +485,19 @@ def update_prices(services, allocation, alpha=0.1):
         else:
             details["updated_price"] = details["initial_price"]  # No change if demand <= supply
 
-# Determine the price each winner needs to pay for their bundle
-def calculate_winner_prices(allocation, services):
-    winner_prices = {}
-    for bid in allocation:
-        total_price = sum(services[service_id]["updated_price"] for service_id in bid["bundle"])
-        winner_prices[bid["customer"]] = total_price
-    return winner_prices
-
-# Update service quantities after auction
-def update_service_quantities(allocation):
-    for bid in allocation:
-        for service_id in bid["bundle"]:
-            cursor.execute("UPDATE services SET quantity = quantity - 1 WHERE id = ?", (service_id,))
-    conn.commit()
-
-# Remove winning bids from the bid list
-def remove_winning_bids(allocation):
-    for bid in allocation:
-        cursor.execute("DELETE FROM bids WHERE id = ?", (bid["id"],))
-    conn.commit()
+# Deduct sold units, retire the losing alternatives of won XOR groups and optionally remove
+# winning bids in one transaction, so readers never see a half-settled auction
+def settle_auction(allocation, remove_winners):
+    with db.writer() as cursor:
+        for bid in allocation:
+            for service_id, units in bid["units"].items():
+                cursor.execute("UPDATE services SET quantity = quantity - ? WHERE id = ?", (units, service_id))
+            if remove_winners:
+                cursor.execute("DELETE FROM bids WHERE id = ?", (bid["id"],))
+            # The losing alternatives of a won XOR group must not win a later auction
+            if xor_key(bid) is not None:
+                cursor.execute("DELETE FROM bids WHERE customer = ? AND xor_group = ? AND id != ?",
+                               (bid["customer"], bid["xor_group"], bid["id"]))
 
 # Main function to resolve auction conflicts and determine winners
 def resolve_conflicts():
@@ -232,34 +509,29 @@ def resolve_conflicts():
     sorted_bids = sort_bids(bids)
 
     # Find the best allocation maximizing social welfare
-    best_allocation, max_welfare = find_best_allocation(services, sorted_bids)
+    best_allocation, max_welfare = solve_allocation(services, sorted_bids)
 
     # Update prices based on demand and supply
     update_prices(services, best_allocation)
 
-    # Calculate the prices each winner needs to pay for their bundle
-    winner_prices = calculate_winner_prices(best_allocation, services)
-
     # Output the results
     print(f"Total Welfare: {max_welfare}")
     print("Accepted Bids and Prices:")
     for bid in best_allocation:
         print(f"Customer: {bid['customer']}, Bid Price: {bid['bid_price']}, "
-              f"Bundle: {[services[s]['name'] for s in bid['bundle']]}, "
-              f"Price to Pay: {winner_prices[bid['customer']]}")
+              f"Bundle: {bundle_names(bid, services)}, "
+              f"Price to Pay: {bundle_price(bid, services)}")
     print("Rejected Bids:")
     for bid in sorted_bids:
         if bid not in best_allocation:
             print(f"Customer: {bid['customer']}, Bid Price: {bid['bid_price']}, "
-                  f"Bundle: {[services[s]['name'] for s in bid['bundle']]}")
+                  f"Bundle: {bundle_names(bid, services)}")
     
-    # Update service quantities after auction
-    update_service_quantities(best_allocation)
-
-    # Remove winning bids from the bid list
+    # Ask before writing anything, then settle quantities and bids together
     print("\nDo you want to remove winning bids from the bid list? (yes/no)")
-    if input().lower() == 'yes':
-        remove_winning_bids(best_allocation)
+    remove_winners = input().lower() == 'yes'
+    settle_auction(best_allocation, remove_winners)
+    if remove_winners:
         print("Winning bids removed from the bid list.\n")
 
 def main_menu():
@@ -288,7 +560,10 @@ def main_menu():
         elif choice == '6':
             add_bid()
         elif choice == '7':
-            resolve_conflicts()
+            try:
+                resolve_conflicts()
+            except ValueError as e:
+                print(f"Error running auction: {e}\n")
         elif choice == '8':
             print("Exiting Auction Engine. Goodbye!")
             break
@@ -299,4 +574,4 @@ def main_menu():
 main_menu()
 
 # Close the database connection when done
-conn.close()
+db.close()